@@ -0,0 +1,12 @@
+# Optional C types for dns_client.py when it is compiled with Cython.
+# The module stays plain Python, so it still runs as is on CPython and PyPy.
+import cython
+
+
+cpdef bytes calculate_qname(str domain)
+
+@cython.locals(start=Py_ssize_t, labels=list, cur=Py_ssize_t, length=Py_ssize_t)
+cpdef dict extract_question(bytes msg)
+
+@cython.locals(p=tuple, rdata=bytes, ip=str)
+cpdef dict extract_resource_record(bytes msg, Py_ssize_t offset)
@@ -88,103 +88,109 @@ domain header).
 import sys
 import socket
 import struct
-from select import select
+import selectors
+from collections import namedtuple
+
+# Precompiled formats of the fixed size parts of the message
+HEADER_STRUCT = struct.Struct("!HHHHHH")
+QUESTION_TYPE_CLASS_STRUCT = struct.Struct("!HH")
+RESOURCE_RECORD_STRUCT = struct.Struct("!HHHIH")
+
+# The request header and the question type/class never change,
+# only the qname depends on the host
+REQUEST_HEADER = (
+    b"\x00\x01"  # message id
+    b"\x01\x00"  # query with only recursion desired
+    b"\x00\x01"  # qd count
+    b"\x00\x00"  # an count
+    b"\x00\x00"  # ns count
+    b"\x00\x00"  # ar count
+)
+REQUEST_TYPE_CLASS = (
+    b"\x00\x01"  # type A
+    b"\x00\x01"  # class IN
+)
+
+RR_TYPE_A = 1
+RR_TYPE_AAAA = 28
+
+DnsFlags = namedtuple("DnsFlags", "qr opcode aa tc rd ra z rcode")
+DnsHeader = namedtuple(
+    "DnsHeader", "message_id flags qd_count an_count ns_count ar_count"
+)
+# (shift, mask) of every flag in the second 16 bits of the header, in the DnsFlags order
+FLAGS_SPEC = (
+    (15, 0x0001),
+    (11, 0x000F),
+    (10, 0x0001),
+    (9, 0x0001),
+    (8, 0x0001),
+    (7, 0x0001),
+    (4, 0x0007),
+    (0, 0x000F),
+)
 
 
 def calculate_qname(domain: str):
-    labels = domain.split(".")
-    return (
-        b"".join(
-            map(lambda label: len(label).to_bytes(1, "big") + label.encode(), labels)
-        )
-        + b"\x00"
-    )
+    qname = bytearray()
+    for label in domain.split("."):
+        encoded_label = label.encode()
+        qname.append(len(encoded_label))
+        qname += encoded_label
+    qname.append(0)
+    return bytes(qname)
 
 
 def make_dns_request_message(host: str):
-    message_id = b"\x00\x01"
-    query_with_only_reqursion_desired = b"\x01\x00"
-    qd_count = b"\x00\x01"
-    an_count = b"\x00\x00"
-    ns_count = b"\x00\x00"
-    ar_count = b"\x00\x00"
-    type_A = b"\x00\x01"
-    class_IN = b"\x00\x01"
-    return (
-        message_id
-        + query_with_only_reqursion_desired
-        + qd_count
-        + an_count
-        + ns_count
-        + ar_count
-        + calculate_qname(host)
-        + type_A
-        + class_IN
-    )
+    return REQUEST_HEADER + calculate_qname(host) + REQUEST_TYPE_CLASS
 
 
 def extract_header(msg: bytes):
-    p = struct.unpack("!HHHHHH", msg[:12])
-    codes = p[1]
-    return {
-        "message_id": p[0],
-        "flags": {
-            "qr": (codes >> 15) & 0x0001,
-            "opcode": (codes >> 11) & 0x000F,
-            "aa": (codes >> 10) & 0x0001,
-            "tc": (codes >> 9) & 0x0001,
-            "rd": (codes >> 8) & 0x0001,
-            "ra": (codes >> 7) & 0x0001,
-            "z": (codes >> 4) & 0x0007,
-            "rcode": codes & 0x000F,
-        },
-        "qd_count": p[2],
-        "an_count": p[3],
-        "ns_count": p[4],
-        "ar_count": p[5],
-    }
+    message_id, codes, *counts = HEADER_STRUCT.unpack_from(msg)
+    flags = DnsFlags._make([(codes >> shift) & mask for shift, mask in FLAGS_SPEC])
+    return DnsHeader(message_id, flags, *counts)
 
 
 def extract_question(msg: bytes):
-    buf = msg[12:]
+    # Walk the message in place, the question section starts right after the header
+    start = HEADER_STRUCT.size
     labels = []
-    length = 0
-    cur = 0
-    lab_counter = 0
-    len_counter = 0
-    while cur < len(buf):
-        if buf[cur] == 0:
-            break
-        if length == 0:
-            length = buf[cur]
-        else:
-            len_counter += 1
-            if len(labels) > lab_counter:
-                labels[lab_counter] = labels[lab_counter] + chr(buf[cur])
-            else:
-                labels.append(chr(buf[cur]))
-            if len_counter == length:
-                length = 0
-                lab_counter += 1
-        cur += 1
+    cur = start
+    # Every label is prefixed with its length, so slice it out at once.
+    # The zero length marks the end of the name
+    length = msg[cur]
+    while length != 0:
+        labels.append(msg[cur + 1 : cur + 1 + length].decode("latin-1"))
+        cur += 1 + length
+        length = msg[cur]
+    qtype, qclass = QUESTION_TYPE_CLASS_STRUCT.unpack_from(msg, cur + 1)
 
     return {
         "name": ".".join(labels),
-        "type": struct.unpack("!H", buf[cur + 1 : cur + 3])[0],
-        "class": struct.unpack("!H", buf[cur + 3 : cur + 5])[0],
-        "answer_offset": cur + 5,
+        "type": qtype,
+        "class": qclass,
+        # The offset is relative to the question section
+        "answer_offset": cur + 5 - start,
     }
 
 
 def extract_resource_record(msg: bytes, offset: int):
-    p = struct.unpack("!HHHIH", msg[offset : offset + 12])
+    p = RESOURCE_RECORD_STRUCT.unpack_from(msg, offset)
+    rdata = msg[offset + 12 : offset + 12 + p[4]]
+    if p[1] == RR_TYPE_A and p[4] == 4:
+        ip = socket.inet_ntoa(rdata)
+    elif p[1] == RR_TYPE_AAAA and p[4] == 16:
+        ip = socket.inet_ntop(socket.AF_INET6, rdata)
+    else:
+        # Not an address, show the raw data
+        ip = rdata.hex(":", 2)
     return {
         "offset": p[0] & 0x3FFF,
         "type": p[1],
         "class": p[2],
         "ttl (seconds)": p[3],
         "rd_length": p[4],
-        "ip": ".".join([str(byte) for byte in msg[offset + 12 : offset + 12 + p[4]]]),
+        "ip": ip,
     }
 
 
@@ -194,8 +200,11 @@ def lookup(host: str, ns_addr: str, timeout: int):
     dns_request = make_dns_request_message(host)
     client_socket.sendto(dns_request, (ns_addr, 53))
 
-    r, w, e = select([client_socket], [], [], timeout)
-    if len(r) == 0:
+    # DefaultSelector picks the most efficient mechanism of the platform (e.g. epoll on Linux)
+    with selectors.DefaultSelector() as selector:
+        selector.register(client_socket, selectors.EVENT_READ)
+        events = selector.select(timeout)
+    if len(events) == 0:
         # timeout
         print("Request timeout")
         sys.exit()
@@ -206,7 +215,7 @@ def lookup(host: str, ns_addr: str, timeout: int):
     print(f"Header: {header_section}")
     question_section = extract_question(dns_response)
     print("Question:", question_section)
-    for i in range(0, header_section["an_count"]):
+    for i in range(0, header_section.an_count):
         offset = 12 + question_section["answer_offset"] + i * 16
         print(f"Answer: {extract_resource_record(dns_response, offset)}")
 
@@ -24,75 +24,123 @@ Thanx to https://github.com/satoshi03/pings
 import sys
 import socket
 import struct
+import functools
 from select import select
 
 ICMP_ECHO_TYPE = 8
 ICMP_ECHO_CODE = 0
+# The numpy call overhead is not worth it for the payloads shorter than this (in bytes)
+NUMPY_CHECKSUM_THRESHOLD = 64
+
+# Precompiled formats of the packet headers
+ICMP_HEADER_STRUCT = struct.Struct("!BBHHH")
+IP_HEADER_STRUCT = struct.Struct("!BBHHHBBHII")
+
+
+@functools.cache
+def load_numpy():
+    """
+    numpy is optional and imported on the first large payload only,
+    so the small packets don't pay for it. Returns None if numpy isn't installed
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+@functools.cache
+def load_numba_kernel():
+    """
+    Compile the loop summing two byte integers in the host format with numba
+    on the first call. Returns None if numba isn't installed
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+
+    # The compiled machine code is cached between the runs
+    @njit(cache=True, boundscheck=False)
+    def sum_words(words):
+        result_sum = 0
+        for word in words:
+            result_sum += word
+        # Fold the sum to 16 bits
+        while result_sum >> 16:
+            result_sum = (result_sum & 0xFFFF) + (result_sum >> 16)
+        return result_sum
+
+    return sum_words
 
 
 def checksum(payload):
     """
     Internet Checksum
     """
-    # Calculate number of two byte steps
-    int_steps = (int(len(payload) / 2)) * 2
-    result_sum = 0
-    step = 0
-    # Calculate the sum of two byte integers taking the endiannes of the host into account
-    lo_byte = 0
-    hi_byte = 0
-    while step < int_steps:
-        if sys.byteorder == "little":
-            [lo_byte, hi_byte] = [payload[step], payload[step + 1]]
+    # Read the payload as a sequence of two byte integers in the network format (big-endian)
+    # at once instead of composing every number byte by byte
+    words_number = len(payload) // 2
+    np = load_numpy() if len(payload) >= NUMPY_CHECKSUM_THRESHOLD else None
+    if np is not None:
+        sum_words = load_numba_kernel()
+        if sum_words is not None:
+            # The folded sum doesn't depend on the byte order of the numbers,
+            # so sum them in the host format and just swap the bytes of the result
+            words = np.frombuffer(payload, dtype=np.uint16, count=words_number)
+            result_sum = int(sum_words(words))
+            if sys.byteorder == "little":
+                result_sum = ((result_sum & 0xFF) << 8) | (result_sum >> 8)
         else:
-            [hi_byte, lo_byte] = [payload[step], payload[step + 1]]
-        number = hi_byte * 256 + lo_byte
-        result_sum += number
-        step += 2
-    # Handle the last byte if the length of the payload is odd
-    if int_steps < len(payload):
-        number = payload[-1]
-        result_sum += number
-    # Cut off all the carries and add them to the resulting sum (the result has to be 2 bytes)
-    carries = result_sum >> 16
-    sum_without_carries = result_sum & 0xFFFF
-    result_sum = sum_without_carries + carries
-    # Add carries again if we got any
-    result_sum = (result_sum >> 16) + (result_sum & 0xFFFF)
+            # Let numpy sum the numbers with the vectorized loop
+            words = np.frombuffer(payload, dtype=">u2", count=words_number)
+            result_sum = int(words.sum(dtype=np.uint64))
+    else:
+        result_sum = sum(struct.unpack_from(f"!{words_number}H", payload))
+    # Handle the last byte if the length of the payload is odd (it is padded with a zero byte)
+    if len(payload) & 1:
+        result_sum += payload[-1] << 8
+    # Cut off all the carries and add them to the resulting sum (the result has to be 2 bytes).
+    # Add carries again while we got any, a large payload may produce more than 32 bits sum
+    while result_sum >> 16:
+        result_sum = (result_sum & 0xFFFF) + (result_sum >> 16)
     # Take the 1's complement of the final sum (flip the bits)
-    complement = ~result_sum
-    # Cut the result to 16 bits, because we do calculation on a system that has more than 16 bits
-    # and it means we got a negative integer as a result
-    complement &= 0xFFFF
-    # Convert two byte int from the host format to the network format (big-endian)
-    return socket.htons(complement)
+    # and cut the result to 16 bits, because we do calculation on a system that has more than 16 bits
+    # and it means we got a negative integer as a result.
+    # The sum was calculated in the network format, so there is no need to convert it
+    return ~result_sum & 0xFFFF
 
 
 def make_packet():
     packet_id = 0
     seq_number = 0
+    data = "Glory to Ukraine!".encode("ascii")
+    # Build the whole packet in one buffer and patch the checksum field in place
+    packet = bytearray(ICMP_HEADER_STRUCT.size + len(data))
+    packet[ICMP_HEADER_STRUCT.size :] = data
     # For computing the checksum , the checksum field should be zero.
-    header_without_checksum = struct.pack(
-        "!BBHHH", ICMP_ECHO_TYPE, ICMP_ECHO_CODE, 0, packet_id, seq_number
+    ICMP_HEADER_STRUCT.pack_into(
+        packet, 0, ICMP_ECHO_TYPE, ICMP_ECHO_CODE, 0, packet_id, seq_number
     )
-    data = bytearray("Glory to Ukraine!".encode("ascii"))
-    resulting_checksum = checksum(header_without_checksum + data)
-    header = struct.pack(
-        "!BBHHH",
+    resulting_checksum = checksum(packet)
+    ICMP_HEADER_STRUCT.pack_into(
+        packet,
+        0,
         ICMP_ECHO_TYPE,
         ICMP_ECHO_CODE,
         resulting_checksum,
         packet_id,
         seq_number,
     )
-    return header + data
+    return bytes(packet)
 
 
 def extract_icmp_header_and_data(packet):
     """
     Parse icmp packet header to dict and return it along with data part
     """
-    p = struct.unpack("!BBHHH", packet[:8])
+    p = ICMP_HEADER_STRUCT.unpack_from(packet)
 
     icmp_header = {}
     icmp_header["type"] = p[0]
@@ -100,14 +148,14 @@ def extract_icmp_header_and_data(packet):
     icmp_header["checksum"] = p[2]
     icmp_header["packet_id"] = p[3]
     icmp_header["sequence"] = p[4]
-    return [icmp_header, packet[8:]]
+    return [icmp_header, packet[ICMP_HEADER_STRUCT.size :]]
 
 
 def extract_ip_header_and_data(packet):
     """
     Parse ip packet header to dict and return it along with data part
     """
-    p = struct.unpack("!BBHHHBBHII", packet[:20])
+    p = IP_HEADER_STRUCT.unpack_from(packet)
 
     ip_header = {}
     ip_header["version"] = p[0]
@@ -119,7 +167,7 @@ def extract_ip_header_and_data(packet):
     ip_header["protocol"] = p[6]
     ip_header["checksum"] = p[7]
     ip_header["src_ip"] = p[8]
-    return [ip_header, packet[20:]]
+    return [ip_header, packet[IP_HEADER_STRUCT.size :]]
 
 
 def ping(host: str, timeout: int):
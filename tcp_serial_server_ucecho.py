@@ -1,27 +1,33 @@
 from socket import SOCK_STREAM, socket
 
 
-def handle_request(server_socket: socket):
+def handle_request(server_socket: socket, verbose: bool):
     connection_socket, addr = server_socket.accept()
     data = connection_socket.recv(1024)
-    text = data.decode()
-    print(f"{text} from {addr}")
-    connection_socket.send(text.upper().encode())
+    if verbose:
+        print(f"{data.decode()} from {addr}")
+    connection_socket.send(data.upper())
     connection_socket.close()
 
 
-def server(host: str, port: int):
+def server(host: str, port: int, verbose: bool):
     server_socket = socket(type=SOCK_STREAM)
     server_socket.bind((host, port))
     server_socket.listen(1)
     while True:
-        handle_request(server_socket)
+        handle_request(server_socket, verbose)
 
 
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-v",
+        action="store_true",
+        dest="verbose",
+        help="show requests",
+    )
     parser.add_argument("host")
     parser.add_argument("port", type=int)
     ns = parser.parse_args()
@@ -7,21 +7,23 @@ import asyncio
 
 
 class EchoServerProtocol:
-    def __init__(self):
+    def __init__(self, verbose):
+        self.verbose = verbose
         self.transport = None
 
     def connection_made(self, transport):
         self.transport = transport
 
     def datagram_received(self, data, addr):
-        print(f"{data.decode()} from {addr}")
-        self.transport.sendto(data.decode().upper().encode(), addr)
+        if self.verbose:
+            print(f"{data.decode()} from {addr}")
+        self.transport.sendto(data.upper(), addr)
 
 
-async def server(ip: str, port: int):
+async def server(ip: str, port: int, verbose: bool):
     loop = asyncio.get_running_loop()
     transport, protocol = await loop.create_datagram_endpoint(
-        EchoServerProtocol,
+        lambda: EchoServerProtocol(verbose),
         local_addr=(ip, port),
     )
     while True:
@@ -34,6 +36,12 @@ if __name__ == "__main__":
     import socket
 
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-v",
+        action="store_true",
+        dest="verbose",
+        help="show requests",
+    )
     parser.add_argument("host")
     parser.add_argument("port")
     ns = parser.parse_args()
@@ -44,4 +52,4 @@ if __name__ == "__main__":
         print("Unknown host: ", args["host"])
         sys.exit(1)
 
-    asyncio.run(server(ip_addr, args["port"]))
+    asyncio.run(server(ip_addr, args["port"], args["verbose"]))
@@ -2,133 +2,115 @@ import asyncio
 import time
 import random
 
+ALPHABET = "qwertyuiopasdfghjklzxcvbnm"
+
 
 def uppercased_echo_successful(request_message, response_message):
-    return request_message.decode().upper().encode() == response_message
+    return request_message.upper() == response_message
+
+
+def request_number(message):
+    """The message starts with its number which isn't changed by the server,
+    so it's used to match the response with the request"""
+    return message.partition(b" ")[0]
 
 
 class EchoClientProtocol:
-    def __init__(self, message, on_con_lost):
-        self.message = message
-        self.on_con_lost = on_con_lost
+    def __init__(self):
         self.transport = None
-        self.result = None
+        self.waiters = {}
 
     def connection_made(self, transport):
         self.transport = transport
-        self.transport.sendto(self.message)
 
     def datagram_received(self, data, addr):
-        self.result = uppercased_echo_successful(self.message, data)
-        self.transport.close()
+        # Late responses to the timed out requests have no waiter anymore
+        waiter = self.waiters.pop(request_number(data), None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(data)
 
     def error_received(self, exc):
         """Let's not rely on this method because UDP is unreliable by definition.
-        To be able to close the socket let's use wait_for(on_con_lost) with timeout"""
-        self.result = exc
-        self.transport.close()
+        To handle the lost responses let's use wait_for(waiter) with timeout"""
+        for waiter in self.waiters.values():
+            if not waiter.done():
+                waiter.set_exception(exc)
+        self.waiters.clear()
 
     def connection_lost(self, exc):
-        if not self.on_con_lost.cancelled():
-            self.on_con_lost.set_result(True)
+        pass
 
 
-async def echo_client(message, addr, timeout):
+async def echo_client(protocol, message, timeout):
+    number = request_number(message)
+    waiter = asyncio.get_running_loop().create_future()
+    protocol.waiters[number] = waiter
+    protocol.transport.sendto(message)
+    try:
+        response = await asyncio.wait_for(waiter, timeout)
+    except asyncio.TimeoutError:
+        return "Timeout"
+    except OSError as exc:
+        return exc
+    finally:
+        protocol.waiters.pop(number, None)
+    return uppercased_echo_successful(message, response)
+
+
+async def consume_messages(messages, addr, timeout, verbose, result_tuple):
+    # Every consumer sends all its requests through its own socket
     loop = asyncio.get_running_loop()
-    on_con_lost = loop.create_future()
     transport, protocol = await loop.create_datagram_endpoint(
-        lambda: EchoClientProtocol(message, on_con_lost),
+        EchoClientProtocol,
         remote_addr=addr,
     )
     try:
-        await asyncio.wait_for(on_con_lost, timeout)
-    except asyncio.TimeoutError:
-        protocol.result = "Timeout"
+        # The consumers share the iterator, so every message is taken only once
+        for payload in messages:
+            time_start = time.perf_counter()
+            result = await echo_client(protocol, payload, timeout)
+            time_finish = time.perf_counter()
+            (success, fail, error) = result_tuple
+            match result:
+                case True:
+                    success.append(time_finish - time_start)
+                case False:
+                    fail.append(time_finish - time_start)
+                case exc:
+                    error.append(time_finish - time_start)
+                    if verbose:
+                        print(exc)
     finally:
         transport.close()
-    return protocol.result
-
-
-async def put_task_in_queue(payload, q: asyncio.Queue):
-    await q.put(payload)
-
-
-async def fill_queue(iterable, q: asyncio.Queue):
-    for item in iterable:
-        await put_task_in_queue(item, q)
-
-
-async def consume_task_from_queue(q, addr, timeout, verbose, result_tuple):
-    while True:
-        payload = await q.get()
-        time_start = time.perf_counter()
-        result = await echo_client(payload.encode(), addr, timeout)
-        time_finish = time.perf_counter()
-        (success, fail, error) = result_tuple
-        match result:
-            case True:
-                success.append(time_finish - time_start)
-            case False:
-                fail.append(time_finish - time_start)
-            case exc:
-                error.append(time_finish - time_start)
-                if verbose:
-                    print(exc)
-
-        q.task_done()  # required by q.join() to unblock
-
-
-def consume_queue(q, addr, consumers, timeout, verbose, result_tuple):
-    return [
-        asyncio.create_task(
-            consume_task_from_queue(q, addr, timeout, verbose, result_tuple)
-        )
-        for i in range(consumers)
-    ]
 
 
 def random_string():
-    alphabet = "qwertyuiopasdfghjklzxcvbnm"
-    alphabetlen = len(alphabet)
-    strlen = random.randint(10, 80)
-    string = ""
-    while len(string) < strlen:
-        letter_idx = random.randint(0, alphabetlen - 1)
-        string += alphabet[letter_idx]
-    return string
+    return "".join(random.choices(ALPHABET, k=random.randint(10, 80)))
 
 
 def tasks_generator(tasks_number):
     for i in range(tasks_number):
-        yield f"{i} - {random_string()}"
+        yield f"{i} - {random_string()}".encode("ascii")
 
 
 async def main(
     result_tuple,
+    payloads: list[bytes],
     ip: str,
     port: int,
-    requests: int,
     concurrency: int,
     timeout: int,
     verbose: bool,
 ):
-    q = asyncio.Queue(concurrency)
-    messages = tasks_generator(requests)
-    fill_queue_task = asyncio.create_task(fill_queue(messages, q))
-    consumers = consume_queue(
-        q,
-        (ip, port),
-        concurrency,
-        timeout,
-        verbose,
-        result_tuple,
-    )
-    await fill_queue_task
-    # Prevent main() from finish until all tasks are done
-    await q.join()
-    # cancel consumers task (break infinite "while True")
-    for consumer in consumers:
-        consumer.cancel()
+    messages = iter(payloads)
+    # Every consumer waits for the response before sending the next request,
+    # so the number of consumers limits the number of concurrent requests.
+    # TaskGroup prevents main() from finish until all the messages are consumed
+    async with asyncio.TaskGroup() as tg:
+        for i in range(concurrency):
+            tg.create_task(
+                consume_messages(messages, (ip, port), timeout, verbose, result_tuple)
+            )
 
 
 if __name__ == "__main__":
@@ -136,6 +118,14 @@ if __name__ == "__main__":
     import sys
     import socket
 
+    try:
+        import uvloop
+
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        # uvloop is optional, without it the default asyncio event loop is used
+        loop_factory = None
+
     random.seed(444)
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -194,10 +184,14 @@ if __name__ == "__main__":
         f"""Host: {args["host"]} ({ip_addr})
 Requests: {params['requests']}
 Concurrency: {params['concurrency']}
-Timeout: {params['timeout']} sec"""
+Timeout: {params['timeout']} sec
+Event loop: {"uvloop" if loop_factory else "asyncio"}"""
     )
+    # Generate all the payloads before the clock starts
+    payloads = list(tasks_generator(params.pop("requests")))
     start_time = time.perf_counter()
-    asyncio.run(main(results, **params))
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main(results, payloads, **params))
     duration = time.perf_counter() - start_time
     (success, fail, error) = results
     print(f"\nDone in {duration} seconds")
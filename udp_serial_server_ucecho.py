@@ -1,24 +1,34 @@
 from socket import socket, SOCK_DGRAM
 
 
-def handle_request(server_socket: socket):
-    data, addr = server_socket.recvfrom(1024)
-    text = data.decode()
-    print(f"{text} from {addr}")
-    server_socket.sendto(text.upper().encode(), addr)
+def handle_request(server_socket: socket, buffer: memoryview, verbose: bool):
+    # Receiving into the preallocated buffer and slicing its memoryview don't copy the data,
+    # only building the uppercased reply does (bytes.upper needs a bytes object)
+    nbytes, addr = server_socket.recvfrom_into(buffer)
+    data = buffer[:nbytes]
+    if verbose:
+        print(f"{str(data, 'utf-8')} from {addr}")
+    server_socket.sendto(data.tobytes().upper(), addr)
 
 
-def server(host: str, port: int):
+def server(host: str, port: int, verbose: bool):
     server_socket = socket(type=SOCK_DGRAM)
     server_socket.bind((host, port))
+    buffer = memoryview(bytearray(1024))
     while True:
-        handle_request(server_socket)
+        handle_request(server_socket, buffer, verbose)
 
 
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-v",
+        action="store_true",
+        dest="verbose",
+        help="show requests",
+    )
     parser.add_argument("host")
     parser.add_argument("port", type=int)
     ns = parser.parse_args()
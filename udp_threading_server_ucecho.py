@@ -1,27 +1,68 @@
-from socketserver import ThreadingUDPServer, BaseRequestHandler
-import threading
+"""
+The threads of one process are serialized by the GIL, and starting a thread
+for every datagram costs more than echoing it. So the server runs several
+processes with a serial loop each, which can use all the CPU cores
+"""
 
+from socket import socket, SOCK_DGRAM, SOL_SOCKET, SO_REUSEPORT
+from multiprocessing import Process
+import logging
+import os
 
-class ThreadedUDPRequestHandler(BaseRequestHandler):
-    def handle(self):
-        data = self.request[0].strip()
-        socket = self.request[1]
-        text = str(data, "ascii")
-        cur_thread = threading.current_thread()
-        print(f"{text} from {self.client_address}, thread {cur_thread.name}")
-        socket.sendto(text.upper().encode(), self.client_address)
+logger = logging.getLogger(__name__)
 
 
-def server(host: str, port: int):
-    serv = ThreadingUDPServer((host, port), ThreadedUDPRequestHandler)
-    serv.serve_forever()
+def handle_request(server_socket: socket):
+    data, addr = server_socket.recvfrom(1024)
+    data = data.strip()
+    # The message is formatted only if the debug level is enabled
+    logger.debug("%s from %s", data, addr)
+    server_socket.sendto(data.upper(), addr)
+
+
+def serve(host: str, port: int, verbose: bool):
+    # Configure logging in the worker itself, with the "spawn" start method
+    # (default on macOS and Windows) it doesn't inherit the parent's configuration
+    if verbose:
+        logging.basicConfig(level=logging.DEBUG, format="%(message)s, %(processName)s")
+    server_socket = socket(type=SOCK_DGRAM)
+    # Let the sockets of all the worker processes bind to the same address,
+    # the kernel distributes the incoming datagrams between them
+    server_socket.setsockopt(SOL_SOCKET, SO_REUSEPORT, 1)
+    server_socket.bind((host, port))
+    while True:
+        handle_request(server_socket)
+
+
+def server(host: str, port: int, workers: int, verbose: bool):
+    processes = [
+        Process(target=serve, args=(host, port, verbose)) for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
 
 
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-w",
+        "--workers",
+        dest="workers",
+        type=int,
+        default=os.cpu_count(),
+        help="number of server processes",
+    )
+    parser.add_argument(
+        "-v",
+        action="store_true",
+        dest="verbose",
+        help="show requests",
+    )
     parser.add_argument("host")
     parser.add_argument("port", type=int)
     ns = parser.parse_args()
-    server(**ns.__dict__)
+    server(ns.host, ns.port, ns.workers if ns.workers > 0 else 1, ns.verbose)